@@ -1,18 +1,30 @@
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import json
+from fastapi.responses import ORJSONResponse
+import orjson
 import os
 from datetime import datetime
 from typing import Dict, List, Optional
 
-from scrapers.scheduler import run_scrapers
+from scrapers.base_scraper import BaseScraper
+from scrapers.scheduler import run_scrapers, load_odds, get_odds_index, shutdown_parse_executor
 from utils.odds_comparison import compare_odds
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release the scrapers' shared resources when the server shuts down"""
+    yield
+    # Close the scrapers' shared connection pool and stop their parsing worker processes
+    await BaseScraper.close_connector()
+    shutdown_parse_executor()
+
 app = FastAPI(title="Sports Betting Odds API", 
               description="API for retrieving live betting odds from multiple sportsbooks",
-              version="1.0.0")
+              version="1.0.0",
+              default_response_class=ORJSONResponse,
+              lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -31,8 +43,8 @@ os.makedirs(os.path.dirname(ODDS_FILE), exist_ok=True)
 
 # Initialize the odds file if it doesn't exist
 if not os.path.exists(ODDS_FILE):
-    with open(ODDS_FILE, "w") as f:
-        json.dump({"last_updated": None, "odds": {}}, f)
+    with open(ODDS_FILE, "wb") as f:
+        f.write(orjson.dumps({"last_updated": None, "odds": {}}))
 
 @app.get("/")
 async def root():
@@ -42,45 +54,47 @@ async def root():
 async def get_odds(sport: Optional[str] = None, bookmaker: Optional[str] = None):
     """Get the latest odds for all sports or filter by sport and/or bookmaker"""
     try:
-        with open(ODDS_FILE, "r") as f:
-            data = json.load(f)
+        data = await load_odds()
         
         if not data.get("odds"):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={"message": "No odds data available. Try again later."}
             )
         
-        # Filter by sport if specified
+        # The cached data is shared, so filter into a new dict instead of modifying it
+        odds = data["odds"]
+        index = get_odds_index()
+        
+        # Filter by sport if specified (case insensitive)
         if sport:
-            filtered_odds = {k: v for k, v in data["odds"].items() if k.lower() == sport.lower()}
-            if not filtered_odds:
-                return JSONResponse(
+            sport_key = index["sports"].get(sport.lower())
+            if sport_key is None:
+                return ORJSONResponse(
                     status_code=404,
                     content={"message": f"No odds data available for sport: {sport}"}
                 )
-            data["odds"] = filtered_odds
+            odds = {sport_key: odds[sport_key]}
         
-        # Filter by bookmaker if specified
+        # Filter by bookmaker if specified (case insensitive)
         if bookmaker:
-            for sport_name, sport_data in data["odds"].items():
-                filtered_bookmakers = {k: v for k, v in sport_data.items() if k.lower() == bookmaker.lower()}
-                if filtered_bookmakers:
-                    data["odds"][sport_name] = filtered_bookmakers
-                else:
-                    # Remove sports that don't have the specified bookmaker
-                    data["odds"][sport_name] = {}
-            
-            # Remove empty sports
-            data["odds"] = {k: v for k, v in data["odds"].items() if v}
+            bookmaker_lower = bookmaker.lower()
+            filtered_odds = {}
+            for sport_name, sport_data in odds.items():
+                bookmaker_key = index["bookmakers"][sport_name].get(bookmaker_lower)
+                # Skip sports that don't have the specified bookmaker
+                if bookmaker_key is not None:
+                    filtered_odds[sport_name] = {bookmaker_key: sport_data[bookmaker_key]}
+            odds = filtered_odds
             
-            if not data["odds"]:
-                return JSONResponse(
+            if not odds:
+                return ORJSONResponse(
                     status_code=404,
                     content={"message": f"No odds data available for bookmaker: {bookmaker}"}
                 )
         
-        return data
+        # Return the response directly so FastAPI skips jsonable_encoder on the large payload
+        return ORJSONResponse(content={**data, "odds": odds})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -88,29 +102,29 @@ async def get_odds(sport: Optional[str] = None, bookmaker: Optional[str] = None)
 async def compare_bookmakers(sport: str, event_id: Optional[str] = None, market: Optional[str] = None):
     """Compare odds across different bookmakers for a specific sport and optionally for a specific event and market"""
     try:
-        with open(ODDS_FILE, "r") as f:
-            data = json.load(f)
+        data = await load_odds()
         
-        if not data.get("odds") or sport.lower() not in [s.lower() for s in data["odds"]]:
-            return JSONResponse(
+        # Get the sport data (case insensitive)
+        sport_key = get_odds_index()["sports"].get(sport.lower())
+        if not data.get("odds") or sport_key is None:
+            return ORJSONResponse(
                 status_code=404,
                 content={"message": f"No odds data available for sport: {sport}"}
             )
         
-        # Get the sport data (case insensitive)
-        sport_key = next((s for s in data["odds"] if s.lower() == sport.lower()), None)
         sport_data = data["odds"][sport_key]
         
         # Compare odds across bookmakers
         comparison = compare_odds(sport_data, event_id, market)
         
         if not comparison:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={"message": f"No comparable odds found for the specified criteria"}
             )
         
-        return {"comparison": comparison, "last_updated": data["last_updated"]}
+        # Return the response directly so FastAPI skips jsonable_encoder on the large payload
+        return ORJSONResponse(content={"comparison": comparison, "last_updated": data["last_updated"]})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -118,11 +132,10 @@ async def compare_bookmakers(sport: str, event_id: Optional[str] = None, market:
 async def get_bookmakers():
     """Get a list of all available bookmakers"""
     try:
-        with open(ODDS_FILE, "r") as f:
-            data = json.load(f)
+        data = await load_odds()
         
         if not data.get("odds"):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={"message": "No odds data available. Try again later."}
             )
@@ -140,11 +153,10 @@ async def get_bookmakers():
 async def get_sports():
     """Get a list of all available sports"""
     try:
-        with open(ODDS_FILE, "r") as f:
-            data = json.load(f)
+        data = await load_odds()
         
         if not data.get("odds"):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={"message": "No odds data available. Try again later."}
             )
@@ -163,4 +175,5 @@ async def trigger_scrape():
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    from run import EVENT_LOOP
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, loop=EVENT_LOOP)
\ No newline at end of file
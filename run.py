@@ -3,20 +3,37 @@ import uvicorn
 import os
 import sys
 import argparse
-from scrapers.scheduler import run_scrapers, schedule_scrapers
+from scrapers.base_scraper import BaseScraper
+from scrapers.scheduler import run_scrapers, schedule_scrapers, shutdown_parse_executor
+
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
+# Use the libuv-based event loop when it is available
+EVENT_LOOP = "uvloop" if uvloop else "auto"
 
 async def run_once():
     """Run the scrapers once and exit"""
-    await run_scrapers()
+    try:
+        await run_scrapers()
+    finally:
+        await BaseScraper.close_connector()
+        shutdown_parse_executor()
     print("Scrapers completed successfully. Data saved to data/odds.json")
 
 def run_api():
     """Run the FastAPI server"""
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, loop=EVENT_LOOP)
 
 async def run_scheduler(interval_seconds):
     """Run the scheduler to periodically update odds data"""
-    await schedule_scrapers(interval_seconds)
+    try:
+        await schedule_scrapers(interval_seconds)
+    finally:
+        await BaseScraper.close_connector()
+        shutdown_parse_executor()
 
 def main():
     parser = argparse.ArgumentParser(description="Sports Betting Odds Scraper")
@@ -27,6 +44,9 @@ def main():
     
     args = parser.parse_args()
     
+    if uvloop:
+        uvloop.install()
+    
     if args.mode == "api":
         run_api()
     elif args.mode == "scrape":
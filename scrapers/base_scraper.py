@@ -1,71 +1,567 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Pattern, Iterator, Iterable, ClassVar, FrozenSet, Tuple, Type, Union
+import io
+import itertools
 import logging
+import os
+import contextlib
+import tempfile
 import aiohttp
+import aiofiles
 import asyncio
-from bs4 import BeautifulSoup
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+import ijson
+import orjson
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+logger = logging.getLogger("scraper")
+
+# State blobs larger than this are stream-parsed so only the requested items are built
+STREAM_PARSE_THRESHOLD = 512 * 1024
+
+# ijson picks its fastest available backend on import. Streaming only pays off with the
+# yajl2_c C extension; the pure-Python fallbacks are slower than decoding with orjson
+STREAM_PARSE_ENABLED = ijson.backend == 'yajl2_c'
+
+# Returned by fetch_html when the server answers a conditional request with 304 Not Modified
+NOT_MODIFIED = object()
+
+# Errors raised when a state blob is not valid JSON, from either parser
+JSON_DECODE_ERRORS = (orjson.JSONDecodeError, ijson.JSONError)
+
+def json_list(value: Any) -> List[Any]:
+    """Get a JSON value as a list of items to iterate over, tolerating malformed data
+    
+    Args:
+        value (Any): The decoded JSON value, which should be an array
+        
+    Returns:
+        List[Any]: The value if it is an array, otherwise an empty list
+    """
+    return value if isinstance(value, list) else []
+
+def _loads_document(json_bytes: bytes) -> Any:
+    """Decode the JSON document at the start of json_bytes with orjson
+    
+    If the document is followed by other content (later statements of the same
+    script), the decode error marks where it ends and the document alone is decoded.
+    
+    Args:
+        json_bytes (bytes): The JSON document, possibly followed by other content
+        
+    Returns:
+        Any: The decoded document
+    """
+    try:
+        return orjson.loads(json_bytes)
+    except orjson.JSONDecodeError as e:
+        try:
+            return orjson.loads(e.doc[:e.pos])
+        except orjson.JSONDecodeError:
+            # Not just trailing content; report the original error
+            raise e
+
+def _iter_stream(json_bytes: bytes, path: str) -> Iterator[Any]:
+    """Stream the values at a path in a JSON document with ijson
+    
+    Content after the document makes ijson fail at the end, dropping the values
+    parsed in the same chunk, so the rest are then taken from a full decode.
+    
+    Args:
+        json_bytes (bytes): The JSON document, possibly followed by other content
+        path (str): An ijson prefix such as "competitions.item.events.item"
+        
+    Returns:
+        Iterator[Any]: The values found at the path
+    """
+    count = 0
+    try:
+        for item in ijson.items(io.BytesIO(json_bytes), path, use_float=True):
+            count += 1
+            yield item
+    except ijson.JSONError as e:
+        if 'trailing garbage' not in str(e):
+            raise
+        yield from itertools.islice(_iter_path(_loads_document(json_bytes), path.split('.')), count, None)
+
+def _iter_path(node: Any, keys: List[str]) -> Iterator[Any]:
+    """Walk decoded JSON along an ijson-style path, yielding the values found
+    
+    Args:
+        node (Any): The decoded JSON value to walk
+        keys (List[str]): The remaining path segments; "item" steps into each list element
+        
+    Returns:
+        Iterator[Any]: The values at the end of the path
+    """
+    if not keys:
+        yield node
+    elif keys[0] == 'item':
+        if isinstance(node, list):
+            for child in node:
+                yield from _iter_path(child, keys[1:])
+    elif isinstance(node, dict) and keys[0] in node:
+        yield from _iter_path(node[keys[0]], keys[1:])
+
+async def write_file_atomic(path: str, data: bytes) -> None:
+    """Write a file by swapping in a complete temporary copy, so readers never see a partial write
+    
+    Each call writes its own uniquely named temporary file, so concurrent writers
+    (in this process or another) cannot interleave; the last one to finish wins.
+    
+    Args:
+        path (str): The file to write
+        data (bytes): The file's new contents
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".",
+        prefix=os.path.basename(path) + ".",
+        suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        # mkstemp creates the file readable by its owner only; keep the usual permissions
+        os.chmod(tmp_path, 0o644)
+        async with aiofiles.open(tmp_path, "wb") as f:
+            await f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+def _extract_odds_in_worker(scraper_cls: Type["BaseScraper"], html: bytes, sport: str,
+                            allowed_markets: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+    """Extract odds data in a worker process
+    
+    Args:
+        scraper_cls (Type[BaseScraper]): The scraper class whose _extract_odds to run
+        html (bytes): The raw HTML
+        sport (str): The sport being scraped
+        allowed_markets (Optional[FrozenSet[str]]): Normalized market filter, see normalize_market_filter
+        
+    Returns:
+        Dict[str, Any]: The extracted odds data
+    """
+    return scraper_cls()._extract_odds(html, sport, allowed_markets)
 
 class BaseScraper(ABC):
     """Base class for all scrapers"""
     
+    # Request headers sent by every scraper, set once on each session
+    HEADERS: ClassVar[Dict[str, str]] = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Cache-Control': 'max-age=0'
+    }
+    
+    # Connection pool shared by every scraper and kept across scrape runs,
+    # so DNS lookups and keep-alive connections outlive a single run
+    _connector: ClassVar[Optional[aiohttp.TCPConnector]] = None
+    _connector_loop: ClassVar[Optional[asyncio.AbstractEventLoop]] = None
+    
+    # Conditional GET state per URL: the ETag/Last-Modified of the last successful
+    # response, the sport and bookmaker it was scraped for, and the odds data
+    # extracted from it, reused when the page is unchanged
+    _conditional_cache: ClassVar[Dict[str, Dict[str, Any]]] = {}
+    _conditional_cache_changed: ClassVar[bool] = False
+    
     def __init__(self, name: str):
         self.name = name
         self.logger = logging.getLogger(f"scraper.{name}")
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'max-age=0'
+        self._session = None
+        # Page URL of each sport to scrape, set by subclasses
+        self.sports_urls: Dict[str, str] = {}
+        # Executor to run the CPU-bound odds extraction in, if any (see extract_odds)
+        self.executor: Optional[Executor] = None
+        # Validators of fetched pages, held until their odds data is cached
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    
+    @classmethod
+    async def _get_connector(cls) -> aiohttp.TCPConnector:
+        """Get the shared connection pool, creating it for the running event loop if needed"""
+        loop = asyncio.get_running_loop()
+        if BaseScraper._connector is None or BaseScraper._connector.closed or BaseScraper._connector_loop is not loop:
+            if BaseScraper._connector is not None and not BaseScraper._connector.closed:
+                # A pool bound to an earlier event loop can't be reused; close it rather than leak its sockets
+                logger.warning("Replacing the shared connection pool left open by another event loop")
+                try:
+                    await BaseScraper._connector.close()
+                except Exception as e:
+                    logger.warning(f"Error closing the previous connection pool: {str(e)}")
+            
+            BaseScraper._connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=10,
+                ttl_dns_cache=600,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True
+            )
+            BaseScraper._connector_loop = loop
+        return BaseScraper._connector
+    
+    @classmethod
+    async def close_connector(cls) -> None:
+        """Close the shared connection pool"""
+        if BaseScraper._connector is not None:
+            await BaseScraper._connector.close()
+            BaseScraper._connector = None
+            BaseScraper._connector_loop = None
+    
+    @classmethod
+    async def load_conditional_cache(cls, path: str, odds: Dict[str, Dict[str, Any]]) -> None:
+        """Load the conditional GET cache saved by a previous process
+        
+        Only validators are saved; each URL's odds data is taken from the stored odds,
+        and URLs whose data is no longer there are dropped.
+        
+        Args:
+            path (str): The file the cache was saved to
+            odds (Dict[str, Dict[str, Any]]): The stored odds data by sport and bookmaker
+        """
+        if BaseScraper._conditional_cache or not os.path.exists(path):
+            return
+        
+        async with aiofiles.open(path, "rb") as f:
+            try:
+                saved = orjson.loads(await f.read())
+            except orjson.JSONDecodeError:
+                return
+        
+        for url, entry in saved.items():
+            data = odds.get(entry.get("sport"), {}).get(entry.get("bookmaker"))
+            if data:
+                BaseScraper._conditional_cache[url] = {**entry, "data": data}
+    
+    @classmethod
+    async def save_conditional_cache(cls, path: str) -> None:
+        """Save the conditional GET cache if it changed since it was last saved
+        
+        Only the validators and where each URL's data is stored are saved, as the data
+        itself is already in the odds file; save after the odds file has been written.
+        
+        Args:
+            path (str): The file to save the cache to
+        """
+        if not BaseScraper._conditional_cache_changed:
+            return
+        
+        saved = {
+            url: {key: entry[key] for key in ("etag", "last_modified", "sport", "bookmaker")}
+            for url, entry in BaseScraper._conditional_cache.items()
         }
+        
+        # Clear the flag first so changes made while the file is written are saved next time
+        BaseScraper._conditional_cache_changed = False
+        try:
+            await write_file_atomic(path, orjson.dumps(saved))
+        except Exception:
+            BaseScraper._conditional_cache_changed = True
+            raise
     
-    @abstractmethod
-    async def scrape(self) -> Dict[str, Dict[str, Any]]:
-        """Scrape the website and return the odds data
+    def get_cached_odds(self, url: str) -> Dict[str, Any]:
+        """Get the odds data extracted from the last successful response for a URL
+        
+        Args:
+            url (str): The URL the data was scraped from
+            
+        Returns:
+            Dict[str, Any]: The cached odds data, or an empty dict if there is none
+        """
+        return self._conditional_cache.get(url, {}).get("data", {})
+    
+    def cache_odds(self, url: str, sport: str, data: Dict[str, Any]) -> None:
+        """Cache odds data against the validators of the response it was extracted from
+        
+        Args:
+            url (str): The URL the data was scraped from
+            sport (str): The sport the data is for
+            data (Dict[str, Any]): The extracted odds data
+        """
+        etag, last_modified = self._validators.pop(url, (None, None))
+        if data and (etag or last_modified):
+            self._conditional_cache[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "sport": sport,
+                "bookmaker": self.name,
+                "data": data
+            }
+        elif self._conditional_cache.pop(url, None) is None:
+            return
+        BaseScraper._conditional_cache_changed = True
+    
+    async def __aenter__(self) -> "BaseScraper":
+        """Open a session on the shared connection pool so every fetch reuses keep-alive connections"""
+        self._session = aiohttp.ClientSession(
+            connector=await self._get_connector(),
+            connector_owner=False,
+            headers=self.HEADERS
+        )
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def scrape(self, market_filter: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Scrape every sport in sports_urls concurrently and return the odds data
+        
+        Args:
+            market_filter (Optional[Iterable[str]]): Market types to keep (e.g. "moneyline");
+                markets matching none of them are skipped before their outcomes are parsed
         
         Returns:
             Dict[str, Dict[str, Any]]: A dictionary with sports as keys and odds data as values
         """
+        self.log_info(f"Starting {self.name} scraper")
+        results = {}
+        allowed_markets = self.normalize_market_filter(market_filter)
+        
+        # Scrape all sports concurrently
+        sport_results = await asyncio.gather(
+            *(self._scrape_one(sport, url, allowed_markets) for sport, url in self.sports_urls.items()),
+            return_exceptions=True
+        )
+        
+        for sport, sport_data in zip(self.sports_urls, sport_results):
+            if isinstance(sport_data, Exception):
+                self.log_error(f"Error scraping {sport} from {self.name}: {str(sport_data)}")
+                continue
+            
+            if sport_data:
+                results[sport] = sport_data
+            else:
+                self.log_info(f"No odds data found for {sport} on {self.name}")
+        
+        self.log_info(f"Completed {self.name} scraper, found data for {len(results)} sports")
+        return results
+    
+    @abstractmethod
+    def _extract_odds(self, html: bytes, sport: str,
+                      allowed_markets: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        """Extract odds data from a page's raw HTML
+        
+        Called by extract_odds, possibly in a worker process (see _extract_odds_in_worker).
+        
+        Args:
+            html (bytes): The raw HTML
+            sport (str): The sport being scraped
+            allowed_markets (Optional[FrozenSet[str]]): Normalized market filter, see normalize_market_filter;
+                markets it does not allow should be skipped
+            
+        Returns:
+            Dict[str, Any]: The extracted odds data
+        """
         pass
     
-    async def fetch_html(self, url: str) -> str:
+    async def fetch_html(self, url: str, conditional: bool = True) -> Union[bytes, object]:
         """Fetch HTML content from a URL
         
+        If odds data from this URL is cached, the request is made conditional and
+        NOT_MODIFIED is returned when the page has not changed; use get_cached_odds
+        then. Otherwise, pass the extracted data to cache_odds.
+        
         Args:
             url (str): The URL to fetch
+            conditional (bool): Whether to use and update the conditional request cache
             
         Returns:
-            str: The HTML content
+            Union[bytes, object]: The raw, undecoded HTML content, or NOT_MODIFIED
         """
+        # Ask the server to skip the body if the page is unchanged since it was cached
+        headers = None
+        cached = self._conditional_cache.get(url) if conditional else None
+        if cached:
+            headers = {}
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        # Outside of ``async with`` fall back to a one-off session
+        if self._session is not None:
+            session_ctx = contextlib.nullcontext(self._session)
+        else:
+            session_ctx = aiohttp.ClientSession(headers=self.HEADERS)
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers) as response:
-                    if response.status == 200:
-                        return await response.text()
+            async with session_ctx as session:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and cached:
+                        return NOT_MODIFIED
+                    elif response.status == 200:
+                        if conditional:
+                            self._validators[url] = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                        return await response.read()
                     else:
                         self.logger.error(f"Failed to fetch {url}: {response.status}")
-                        return ""
+                        return b""
         except Exception as e:
             self.logger.error(f"Error fetching {url}: {str(e)}")
-            return ""
+            return b""
+    
+    async def _scrape_one(self, sport: str, url: str,
+                          allowed_markets: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        """Fetch one sport's page and extract its odds data
+        
+        Filtered results are partial, so they bypass the conditional request cache.
+        
+        Args:
+            sport (str): The sport being scraped
+            url (str): The URL of the sport's page
+            allowed_markets (Optional[FrozenSet[str]]): Normalized market filter, see normalize_market_filter
+            
+        Returns:
+            Dict[str, Any]: The extracted odds data, or an empty dict if there is none
+        """
+        self.log_info(f"Scraping {sport} from {self.name}")
+        html = await self.fetch_html(url, conditional=allowed_markets is None)
+        
+        if html is NOT_MODIFIED:
+            # The page is unchanged, so reuse the odds extracted from it last time
+            return self.get_cached_odds(url)
+        
+        if not html:
+            self.log_error(f"Failed to fetch HTML for {sport} from {self.name}")
+            return {}
+        
+        # Extract the odds data
+        sport_data = await self.extract_odds(html, sport, allowed_markets)
+        if allowed_markets is None:
+            self.cache_odds(url, sport, sport_data)
+        return sport_data
+    
+    async def extract_odds(self, html: bytes, sport: str,
+                           allowed_markets: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        """Extract odds data from a page with the scraper's _extract_odds
+        
+        When an executor is set the extraction runs there, so with a process pool
+        the scrapers parse on separate cores instead of contending for the GIL. If the
+        pool is broken (a worker process died), the scraper drops it and parses in a
+        thread instead; whoever set the executor should replace it.
+        
+        Args:
+            html (bytes): The raw HTML
+            sport (str): The sport being scraped
+            allowed_markets (Optional[FrozenSet[str]]): Normalized market filter, see normalize_market_filter
+            
+        Returns:
+            Dict[str, Any]: The extracted odds data
+        """
+        if self.executor is None:
+            return self._extract_odds(html, sport, allowed_markets)
+        
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self.executor, _extract_odds_in_worker, type(self), html, sport, allowed_markets
+            )
+        except BrokenProcessPool as e:
+            self.log_error(f"Parsing process pool is broken, parsing {sport} in a thread instead: {str(e)}")
+            self.executor = None
+            return await asyncio.to_thread(self._extract_odds, html, sport, allowed_markets)
+    
+    @staticmethod
+    def normalize_market_filter(market_filter: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+        """Normalize a market filter passed to scrape for use while parsing
+        
+        Args:
+            market_filter (Optional[Iterable[str]]): Market types to keep, or None for all
+            
+        Returns:
+            Optional[FrozenSet[str]]: The lowercased market types, or None to keep every market
+        """
+        if not market_filter:
+            return None
+        return frozenset(market.lower() for market in market_filter)
+    
+    @staticmethod
+    def market_allowed(market_name: Optional[str], allowed_markets: Optional[FrozenSet[str]]) -> bool:
+        """Check a market against a normalized market filter
+        
+        Markets match like compare_odds' market_type: case-insensitively, when the
+        market name contains one of the allowed types.
+        
+        Args:
+            market_name (Optional[str]): The market's name
+            allowed_markets (Optional[FrozenSet[str]]): Normalized market filter, or None to allow all
+            
+        Returns:
+            bool: Whether the market should be parsed
+        """
+        if allowed_markets is None:
+            return True
+        name_lower = (market_name or '').lower()
+        return any(market in name_lower for market in allowed_markets)
     
-    def parse_html(self, html: str) -> BeautifulSoup:
-        """Parse HTML content using BeautifulSoup
+    def extract_json_object(self, html: bytes, marker: bytes, pattern: Pattern) -> Optional[bytes]:
+        """Extract the JSON object that directly follows a pattern match
+        
+        The object is sliced up to the end of its script element rather than matched
+        brace by brace. JSON inside a script cannot contain "</script>" unescaped, so
+        braces and quotes in strings are no concern. When other statements follow the
+        assignment they are included in the slice; iter_json_items decodes only the
+        leading object.
         
         Args:
-            html (str): The HTML content to parse
+            html (bytes): The raw HTML to search
+            marker (bytes): A literal prefix of the pattern, used to locate candidate matches
+            pattern (Pattern): A compiled bytes pattern whose match ends at the opening brace
             
         Returns:
-            BeautifulSoup: The parsed HTML
+            Optional[bytes]: The JSON object, or None if it could not be found
         """
-        return BeautifulSoup(html, 'lxml')
+        # Jump between occurrences of the marker with bytes.find and only run the
+        # pattern anchored at each one, rather than scanning the page with the regex
+        match = None
+        index = html.find(marker)
+        while index != -1:
+            match = pattern.match(html, index)
+            if match:
+                break
+            index = html.find(marker, index + 1)
+        
+        if not match:
+            return None
+        
+        # Bound the object with C-level searches instead of matching braces in Python
+        end = html.find(b'</script>', match.end())
+        if end == -1:
+            return None
+        
+        return html[match.end():end].rstrip(b'; \t\r\n') or None
+    
+    def iter_json_items(self, json_bytes: bytes, path: str) -> Iterator[Any]:
+        """Iterate over the values at a path in a JSON document
+        
+        Large documents are stream-parsed with ijson's C backend so the parts outside
+        the path are never materialized; small ones, or all of them when the C backend
+        is unavailable (see STREAM_PARSE_ENABLED), are decoded in one go with orjson.
+        Content after the document, as left by extract_json_object, is ignored.
+        Decoding errors (see JSON_DECODE_ERRORS) may be raised while iterating.
+        
+        Args:
+            json_bytes (bytes): The JSON document
+            path (str): An ijson prefix such as "competitions.item.events.item"
+            
+        Returns:
+            Iterator[Any]: The values found at the path
+        """
+        if STREAM_PARSE_ENABLED and len(json_bytes) > STREAM_PARSE_THRESHOLD:
+            return _iter_stream(json_bytes, path)
+        
+        return _iter_path(_loads_document(json_bytes), path.split('.'))
     
     def log_info(self, message: str) -> None:
         """Log an info message
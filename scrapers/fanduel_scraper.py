@@ -1,7 +1,14 @@
-from typing import Dict, Any
-import json
+from typing import Dict, Any, FrozenSet, Optional
 import re
-from .base_scraper import BaseScraper
+import sys
+from .base_scraper import BaseScraper, JSON_DECODE_ERRORS, json_list
+from .models import Event, Market, Outcome
+
+# Marks the page's bootstrap script that assigns the state JSON
+_INITIAL_STATE_MARKER = b"window.INITIAL_STATE"
+
+# Matches the state assignment in the page's bootstrap script, up to the opening brace
+_INITIAL_STATE_RE = re.compile(rb'window\.INITIAL_STATE\s*=\s*(?=\{)')
 
 class FanduelScraper(BaseScraper):
     """Scraper for FanDuel sportsbook"""
@@ -17,82 +24,39 @@ class FanduelScraper(BaseScraper):
             "Soccer": f"{self.base_url}/navigation/soccer"
         }
     
-    async def scrape(self) -> Dict[str, Dict[str, Any]]:
-        """Scrape FanDuel for odds data"""
-        self.log_info("Starting FanDuel scraper")
-        results = {}
+    def _extract_odds(self, html: bytes, sport: str,
+                      allowed_markets: Optional[FrozenSet[str]] = None) -> Dict[str, Any]:
+        """Extract odds data from the raw HTML
         
-        for sport, url in self.sports_urls.items():
-            self.log_info(f"Scraping {sport} from FanDuel")
-            html = await self.fetch_html(url)
-            
-            if not html:
-                self.log_error(f"Failed to fetch HTML for {sport} from FanDuel")
-                continue
-            
-            # Parse the HTML
-            soup = self.parse_html(html)
-            
-            # Extract the odds data
-            sport_data = self._extract_odds(soup, sport)
-            
-            if sport_data:
-                results[sport] = sport_data
-            else:
-                self.log_info(f"No odds data found for {sport} on FanDuel")
-        
-        self.log_info(f"Completed FanDuel scraper, found data for {len(results)} sports")
-        return results
-    
-    def _extract_odds(self, soup, sport: str) -> Dict[str, Any]:
-        """Extract odds data from the parsed HTML
+        Unexpected errors propagate and are logged once per sport by scrape.
         
         Args:
-            soup: The parsed HTML
+            html: The raw HTML
             sport: The sport being scraped
+            allowed_markets: Normalized market filter; other markets are skipped
             
         Returns:
             Dict[str, Any]: The extracted odds data
         """
-        events = []
+        # Pull the initial state JSON straight out of the raw HTML
+        json_str = self.extract_json_object(html, _INITIAL_STATE_MARKER, _INITIAL_STATE_RE)
+        if not json_str:
+            self.log_error(f"Could not find initial state data for {sport}")
+            return {}
         
         try:
-            # Look for the script tag containing the initial state data
-            script_tags = soup.find_all("script")
-            data_script = None
-            
-            for script in script_tags:
-                if script.string and "window.INITIAL_STATE" in script.string:
-                    data_script = script.string
-                    break
-            
-            if not data_script:
-                self.log_error(f"Could not find initial state data for {sport}")
-                return {}
-            
-            # Extract the JSON data
-            json_str = re.search(r'window\.INITIAL_STATE\s*=\s*(\{.*\});', data_script, re.DOTALL)
-            if not json_str:
-                self.log_error(f"Could not extract JSON data for {sport}")
-                return {}
-            
-            try:
-                data = json.loads(json_str.group(1))
-                
-                # Navigate through the data structure to find the events
-                if 'competitions' in data:
-                    for competition in data['competitions']:
-                        if 'events' in competition:
-                            for event in competition['events']:
-                                event_data = self._parse_event(event)
-                                if event_data:
-                                    events.append(event_data)
-            except json.JSONDecodeError as e:
-                self.log_error(f"Error parsing JSON data for {sport}: {str(e)}")
-                return {}
-            
-        except Exception as e:
-            self.log_error(f"Error extracting odds for {sport}: {str(e)}")
+            # Only the events are needed from the (often multi-MB) state
+            parse_event = self._parse_event
+            events = [
+                event_data
+                for event_data in (
+                    parse_event(event, allowed_markets)
+                    for event in self.iter_json_items(json_str, 'competitions.item.events.item')
+                )
+                if event_data
+            ]
+        except JSON_DECODE_ERRORS as e:
+            self.log_error(f"Error parsing JSON data for {sport}: {str(e)}")
             return {}
         
         return {
@@ -100,74 +64,64 @@ class FanduelScraper(BaseScraper):
             "last_updated": None  # This will be set by the scheduler
         }
     
-    def _parse_event(self, event) -> Dict[str, Any]:
+    def _parse_event(self, event, allowed_markets: Optional[FrozenSet[str]] = None) -> Optional[Event]:
         """Parse an event from the JSON data
         
         Args:
             event: The event data from the JSON
+            allowed_markets: Normalized market filter; other markets are skipped
             
         Returns:
-            Dict[str, Any]: The parsed event data
+            Optional[Event]: The parsed event, or None if it is not an object
         """
-        try:
-            event_id = event.get('id')
-            event_name = event.get('name', '')
-            start_time = event.get('startTime')
-            
-            # Extract teams
-            teams = []
-            if 'competitors' in event:
-                for competitor in event['competitors']:
-                    teams.append(competitor.get('name', ''))
-            
-            # Extract markets and odds
-            markets = []
-            if 'markets' in event:
-                for market in event['markets']:
-                    market_data = self._parse_market(market)
-                    if market_data:
-                        markets.append(market_data)
-            
-            return {
-                "id": event_id,
-                "name": event_name,
-                "start_time": start_time,
-                "teams": teams,
-                "markets": markets
-            }
-        except Exception as e:
-            self.log_error(f"Error parsing event: {str(e)}")
-            return {}
+        if not isinstance(event, dict):
+            return None
+        
+        get = event.get
+        parse_market = self._parse_market
+        return Event(
+            id=get('id'),
+            name=get('name', ''),
+            start_time=get('startTime'),
+            teams=[competitor.get('name', '') for competitor in json_list(get('competitors')) if isinstance(competitor, dict)],
+            markets=[
+                market_data
+                for market_data in (parse_market(market, allowed_markets) for market in json_list(get('markets')))
+                if market_data
+            ]
+        )
     
-    def _parse_market(self, market) -> Dict[str, Any]:
+    def _parse_market(self, market, allowed_markets: Optional[FrozenSet[str]] = None) -> Optional[Market]:
         """Parse a market from the JSON data
         
         Args:
             market: The market data from the JSON
+            allowed_markets: Normalized market filter; other markets are skipped
             
         Returns:
-            Dict[str, Any]: The parsed market data
+            Optional[Market]: The parsed market, or None if it is not an object or is filtered out
         """
-        try:
-            market_id = market.get('id')
-            market_name = market.get('marketName', '')
-            
-            # Extract outcomes
-            outcomes = []
-            if 'selections' in market:
-                for selection in market['selections']:
-                    outcome_data = {
-                        "name": selection.get('name', ''),
-                        "price": selection.get('americanOdds'),
-                        "points": selection.get('line')
-                    }
-                    outcomes.append(outcome_data)
-            
-            return {
-                "id": market_id,
-                "name": market_name,
-                "outcomes": outcomes
-            }
-        except Exception as e:
-            self.log_error(f"Error parsing market: {str(e)}")
-            return {}
\ No newline at end of file
+        if not isinstance(market, dict):
+            return None
+        
+        get = market.get
+        market_name = get('marketName', '')
+        if type(market_name) is str:
+            # The same few market names repeat across every event
+            market_name = sys.intern(market_name)
+        if allowed_markets is not None and not self.market_allowed(market_name, allowed_markets):
+            return None
+        
+        return Market(
+            id=get('id'),
+            name=market_name,
+            outcomes=[
+                Outcome(
+                    name=selection.get('name', ''),
+                    price=selection.get('americanOdds'),
+                    points=selection.get('line')
+                )
+                for selection in json_list(get('selections'))
+                if isinstance(selection, dict)
+            ]
+        )
\ No newline at end of file
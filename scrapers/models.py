@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+# Records produced by the scrapers. They use __slots__ to keep the thousands
+# created per scrape compact, and orjson serializes dataclasses natively, so
+# they are written to the odds file as plain JSON objects.
+
+@dataclass(slots=True)
+class Outcome:
+    """A single outcome of a market and its price"""
+
+    name: str
+    price: Optional[Any]
+    points: Optional[float]
+
+@dataclass(slots=True)
+class Market:
+    """A betting market of an event"""
+
+    id: Optional[Any]
+    name: str
+    outcomes: List[Outcome]
+
+@dataclass(slots=True)
+class Event:
+    """A sporting event and the markets offered on it"""
+
+    id: Optional[Any]
+    name: str
+    start_time: Optional[str]
+    teams: List[str]
+    markets: List[Market]
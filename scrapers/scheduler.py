@@ -1,10 +1,14 @@
 import asyncio
-import json
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import orjson
 import os
 from datetime import datetime
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
+from .base_scraper import BaseScraper, write_file_atomic
 from .draftkings_scraper import DraftKingsScraper
 from .fanduel_scraper import FanduelScraper
 from .betmgm_scraper import BetMGMScraper
@@ -19,9 +23,103 @@ logger = logging.getLogger("scheduler")
 # Path to the JSON file where odds data is stored
 ODDS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "odds.json")
 
+# Path to the file where validators and data for conditional requests are kept between runs
+HTTP_CACHE_FILE = os.path.join(os.path.dirname(ODDS_FILE), "http_cache.json")
+
 # Ensure the data directory exists
 os.makedirs(os.path.dirname(ODDS_FILE), exist_ok=True)
 
+# Worker processes for the CPU-bound page parsing (one per bookmaker), kept across runs
+_parse_executor: Optional[ProcessPoolExecutor] = None
+
+def _get_parse_executor() -> ProcessPoolExecutor:
+    """Get the parsing process pool, creating it on first use"""
+    global _parse_executor
+    if _parse_executor is None:
+        # Spawn fresh workers rather than forking the running server with its event loop and threads
+        _parse_executor = ProcessPoolExecutor(max_workers=3, mp_context=multiprocessing.get_context("spawn"))
+    return _parse_executor
+
+def shutdown_parse_executor() -> None:
+    """Stop the parsing worker processes; the next run starts a new pool"""
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=True, cancel_futures=True)
+        _parse_executor = None
+
+# In-memory copy of the odds file, keyed by the file's modification time
+_odds_cache: Dict[str, Any] = {"mtime": None, "data": None, "index": None}
+
+def _cache_odds(data: Dict[str, Any], mtime: float) -> None:
+    """Store odds data in the cache along with its case-insensitive lookup index
+    
+    Args:
+        data: The odds data
+        mtime: The modification time of the odds file holding this data
+    """
+    odds = data.get("odds") or {}
+    _odds_cache["data"] = data
+    _odds_cache["index"] = {
+        # Lowercased sport name -> sport key
+        "sports": {sport.lower(): sport for sport in odds},
+        # Sport key -> lowercased bookmaker name -> bookmaker key
+        "bookmakers": {
+            sport: {bookmaker.lower(): bookmaker for bookmaker in sport_data}
+            for sport, sport_data in odds.items()
+        }
+    }
+    _odds_cache["mtime"] = mtime
+
+def _read_odds_file() -> Dict[str, Any]:
+    """Read and decode the odds file (blocking)
+    
+    Returns:
+        Dict[str, Any]: The stored odds data
+    """
+    with open(ODDS_FILE, "rb") as f:
+        return orjson.loads(f.read())
+
+def _encode_odds(data: Dict[str, Any]) -> Tuple[bytes, Dict[str, Any]]:
+    """Encode odds data for the odds file and decode it back into plain dicts (blocking)
+    
+    The scrapers' records are dataclasses, while readers expect the JSON-shaped
+    dicts they would get from reading the file.
+    
+    Args:
+        data: The odds data
+        
+    Returns:
+        Tuple[bytes, Dict[str, Any]]: The file contents and the data as read back from them
+    """
+    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return payload, orjson.loads(payload)
+
+async def load_odds() -> Dict[str, Any]:
+    """Load the odds data, only re-reading the odds file when it has changed
+    
+    The returned data is shared between callers and must not be modified.
+    
+    Returns:
+        Dict[str, Any]: The stored odds data
+    """
+    mtime = os.path.getmtime(ODDS_FILE)
+    if mtime != _odds_cache["mtime"]:
+        # Read in a worker thread so a cold read doesn't block the event loop
+        _cache_odds(await asyncio.to_thread(_read_odds_file), mtime)
+    
+    return _odds_cache["data"]
+
+def get_odds_index() -> Dict[str, Dict[str, Any]]:
+    """Get the case-insensitive lookup index for the data last returned by load_odds
+    
+    Call it right after load_odds, without awaiting in between, so both match.
+    
+    Returns:
+        Dict[str, Dict[str, Any]]: Lowercased names mapped to their keys under "sports",
+            and per sport under "bookmakers"
+    """
+    return _odds_cache["index"]
+
 async def run_scrapers() -> None:
     """Run all scrapers and update the odds data"""
     logger.info("Starting scraper scheduler")
@@ -33,9 +131,32 @@ async def run_scrapers() -> None:
         BetMGMScraper()
     ]
     
-    # Run all scrapers concurrently
-    scraper_tasks = [scraper.scrape() for scraper in scrapers]
-    results = await asyncio.gather(*scraper_tasks, return_exceptions=True)
+    # Parse pages in worker processes so the bookmakers' parsing runs in parallel
+    executor = _get_parse_executor()
+    for scraper in scrapers:
+        scraper.executor = executor
+    
+    # Restore the conditional request cache so a restarted process starts warm
+    try:
+        stored_odds = {}
+        if os.path.exists(ODDS_FILE):
+            stored_odds = (await load_odds()).get("odds") or {}
+        await BaseScraper.load_conditional_cache(HTTP_CACHE_FILE, stored_odds)
+    except Exception as e:
+        logger.error(f"Error loading HTTP cache: {str(e)}")
+    
+    # Run all scrapers concurrently, each sharing one pooled HTTP session
+    async with contextlib.AsyncExitStack() as stack:
+        for scraper in scrapers:
+            await stack.enter_async_context(scraper)
+        
+        scraper_tasks = [scraper.scrape() for scraper in scrapers]
+        results = await asyncio.gather(*scraper_tasks, return_exceptions=True)
+    
+    # Scrapers drop the pool if it broke (e.g. a worker was killed), so start a fresh one next run
+    if any(scraper.executor is not executor for scraper in scrapers):
+        logger.warning("Parsing process pool is broken, replacing it")
+        shutdown_parse_executor()
     
     # Process results
     all_odds = {}
@@ -51,25 +172,34 @@ async def run_scrapers() -> None:
             
             all_odds[sport][scrapers[i].name] = sport_data
     
-    # Update the odds file
-    await update_odds_file(all_odds)
+    # Update the odds file. The HTTP cache points into it, so only save that once it is written
+    if await update_odds_file(all_odds):
+        try:
+            await BaseScraper.save_conditional_cache(HTTP_CACHE_FILE)
+        except Exception as e:
+            logger.error(f"Error saving HTTP cache: {str(e)}")
     
     logger.info("Completed scraper scheduler")
 
-async def update_odds_file(odds_data: Dict[str, Dict[str, Any]]) -> None:
+async def update_odds_file(odds_data: Dict[str, Dict[str, Any]]) -> bool:
     """Update the odds file with new data
     
     Args:
         odds_data: The new odds data
+        
+    Returns:
+        bool: Whether the odds file was written
     """
     try:
-        # Load existing data if file exists
-        if os.path.exists(ODDS_FILE):
-            with open(ODDS_FILE, "r") as f:
-                try:
-                    existing_data = json.load(f)
-                except json.JSONDecodeError:
-                    existing_data = {"last_updated": None, "odds": {}}
+        # Load existing data if file exists, reusing the cached copy when it is current.
+        # The cached dict is shared with readers, so copy it before updating
+        if os.path.exists(ODDS_FILE) and _odds_cache["mtime"] == os.path.getmtime(ODDS_FILE):
+            existing_data = dict(_odds_cache["data"])
+        elif os.path.exists(ODDS_FILE):
+            try:
+                existing_data = await asyncio.to_thread(_read_odds_file)
+            except orjson.JSONDecodeError:
+                existing_data = {"last_updated": None, "odds": {}}
         else:
             existing_data = {"last_updated": None, "odds": {}}
         
@@ -77,13 +207,20 @@ async def update_odds_file(odds_data: Dict[str, Dict[str, Any]]) -> None:
         existing_data["odds"] = odds_data
         existing_data["last_updated"] = datetime.now().isoformat()
         
-        # Write the updated data back to the file
-        with open(ODDS_FILE, "w") as f:
-            json.dump(existing_data, f, indent=2)
+        # Encoding the multi-MB payload is CPU-bound, so keep it off the event loop
+        payload, plain_data = await asyncio.to_thread(_encode_odds, existing_data)
+        
+        # Write to a temporary file and swap it in so readers never see a partial write
+        await write_file_atomic(ODDS_FILE, payload)
+        
+        # Publish the new data straight into the cache so readers skip the file read
+        _cache_odds(plain_data, os.path.getmtime(ODDS_FILE))
         
         logger.info(f"Updated odds file with data for {len(odds_data)} sports")
+        return True
     except Exception as e:
         logger.error(f"Error updating odds file: {str(e)}")
+        return False
 
 # Function to run the scrapers on a schedule
 async def schedule_scrapers(interval_seconds: int = 300) -> None:
@@ -92,11 +229,23 @@ async def schedule_scrapers(interval_seconds: int = 300) -> None:
     Args:
         interval_seconds: The interval between scraper runs in seconds (default: 5 minutes)
     """
+    loop = asyncio.get_running_loop()
+    
+    # Schedule runs against a monotonic deadline so slow scrapes don't make the period drift
+    next_run = loop.time()
     while True:
+        next_run += interval_seconds
         try:
             await run_scrapers()
         except Exception as e:
             logger.error(f"Error in scheduler: {str(e)}")
         
-        logger.info(f"Waiting {interval_seconds} seconds until next scrape")
-        await asyncio.sleep(interval_seconds)
\ No newline at end of file
+        delay = next_run - loop.time()
+        if delay < 0:
+            logger.warning(f"Scrape overran the {interval_seconds} second interval by {-delay:.1f} seconds")
+            # Start the next run now and realign the schedule from here
+            next_run = loop.time()
+            delay = 0
+        
+        logger.info(f"Waiting {delay:.1f} seconds until next scrape")
+        await asyncio.sleep(delay)
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+import multiprocessing
+import os
+import re
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+import orjson
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from scrapers import base_scraper
+from scrapers.base_scraper import BaseScraper, JSON_DECODE_ERRORS
+
+_MARKER = b"window.INITIAL_STATE"
+_PATTERN = re.compile(rb'window\.INITIAL_STATE\s*=\s*(?=\{)')
+
+class _Scraper(BaseScraper):
+    """Minimal scraper for exercising BaseScraper helpers"""
+    
+    def __init__(self):
+        super().__init__("Test")
+    
+    def _extract_odds(self, html, sport, allowed_markets=None):
+        return {"sport": sport}
+
+def _page(script: bytes) -> bytes:
+    return b"<html><head><script>var x = 1;</script></head><body><script>" + script + b"</script></body></html>"
+
+class ExtractJsonObjectTest(unittest.TestCase):
+    def setUp(self):
+        self.scraper = _Scraper()
+    
+    def extract(self, html: bytes):
+        return self.scraper.extract_json_object(html, _MARKER, _PATTERN)
+    
+    def test_braces_and_escaped_quotes_inside_strings(self):
+        state = {"a": "}{", "b": 'say "hi" {', "c": {"d": ["}", "\\"]}}
+        json_bytes = self.extract(_page(b"window.INITIAL_STATE = " + orjson.dumps(state) + b";\n  "))
+        self.assertEqual(orjson.loads(json_bytes), state)
+    
+    def test_trailing_semicolon_and_whitespace_are_stripped(self):
+        json_bytes = self.extract(_page(b'window.INITIAL_STATE={"a": 1};\r\n\t'))
+        self.assertEqual(json_bytes, b'{"a": 1}')
+    
+    def test_marker_without_assignment_is_skipped(self):
+        html = _page(b'if (window.INITIAL_STATE) {}; window.INITIAL_STATE = {"a": 1}')
+        self.assertEqual(self.extract(html), b'{"a": 1}')
+    
+    def test_statements_after_the_assignment(self):
+        state = {"competitions": [{"events": [{"id": 1}, {"id": "};"}]}]}
+        html = _page(b"window.INITIAL_STATE = " + orjson.dumps(state) + b"; window.X = {\"a\": 1};")
+        json_bytes = self.extract(html)
+        items = list(self.scraper.iter_json_items(json_bytes, "competitions.item.events.item"))
+        self.assertEqual(items, [{"id": 1}, {"id": "};"}])
+    
+    @unittest.skipUnless(base_scraper.STREAM_PARSE_ENABLED, "ijson's C backend is not installed")
+    def test_statements_after_the_assignment_when_streaming(self):
+        # Large enough that ijson yields some events before it reaches the trailing statement
+        events = [{"id": i, "name": "x" * 100} for i in range(2000)]
+        json_bytes = self.extract(_page(
+            b"window.INITIAL_STATE = " + orjson.dumps({"competitions": [{"events": events}]}) + b"; window.X = 1;"
+        ))
+        for threshold in (0, len(json_bytes) + 1):
+            with mock.patch.object(base_scraper, "STREAM_PARSE_THRESHOLD", threshold):
+                items = list(self.scraper.iter_json_items(json_bytes, "competitions.item.events.item"))
+            self.assertEqual(items, events)
+    
+    def test_malformed_state_still_raises(self):
+        json_bytes = self.extract(_page(b'window.INITIAL_STATE = {"competitions": [}; window.X = 1;'))
+        with self.assertRaises(JSON_DECODE_ERRORS):
+            list(self.scraper.iter_json_items(json_bytes, "competitions.item.events.item"))
+    
+    def test_missing_state_returns_none(self):
+        self.assertIsNone(self.extract(_page(b"var y = 2;")))
+    
+    def test_unterminated_script_returns_none(self):
+        self.assertIsNone(self.extract(b'<script>window.INITIAL_STATE = {"a": 1};'))
+
+class ExtractOddsTest(unittest.TestCase):
+    def test_broken_process_pool_falls_back_to_a_thread(self):
+        pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        self.addCleanup(pool.shutdown)
+        with self.assertRaises(BrokenProcessPool):
+            pool.submit(os._exit, 1).result()
+        
+        scraper = _Scraper()
+        scraper.executor = pool
+        self.assertEqual(asyncio.run(scraper.extract_odds(b"", "NFL")), {"sport": "NFL"})
+        self.assertIsNone(scraper.executor)
+
+class ScrapeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_collects_sports_with_data(self):
+        scraper = _Scraper()
+        scraper.sports_urls = {"NFL": "nfl", "NBA": "nba", "MLB": "mlb"}
+        
+        async def scrape_one(sport, url, allowed_markets=None):
+            if sport == "NBA":
+                raise RuntimeError("boom")
+            return {"events": [sport]} if sport == "NFL" else {}
+        
+        scraper._scrape_one = mock.AsyncMock(side_effect=scrape_one)
+        self.assertEqual(await scraper.scrape(["Moneyline"]), {"NFL": {"events": ["NFL"]}})
+        scraper._scrape_one.assert_any_await("NFL", "nfl", frozenset({"moneyline"}))
+
+class ConditionalRequestTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch.multiple(BaseScraper, _conditional_cache={}, _conditional_cache_changed=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        # Serves a page with an ETag and answers a matching If-None-Match with 304
+        self.if_none_match = []
+        
+        async def handler(request):
+            self.if_none_match.append(request.headers.get("If-None-Match"))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304)
+            return web.Response(body=b"<html></html>", headers={"ETag": '"v1"'})
+        
+        app = web.Application()
+        app.router.add_get("/nfl", handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.url = str(self.server.make_url("/nfl"))
+        
+        self.scraper = _Scraper()
+        self.scraper._extract_odds = mock.Mock(return_value={"events": [{"id": 1}]})
+    
+    async def asyncTearDown(self):
+        await self.server.close()
+        await BaseScraper.close_connector()
+    
+    async def test_unchanged_page_reuses_cached_odds(self):
+        async with self.scraper:
+            first = await self.scraper._scrape_one("NFL", self.url)
+            second = await self.scraper._scrape_one("NFL", self.url)
+        
+        self.assertEqual(first, {"events": [{"id": 1}]})
+        self.assertIs(second, first)
+        self.assertEqual(self.if_none_match, [None, '"v1"'])
+        self.scraper._extract_odds.assert_called_once()
+    
+    async def test_filtered_scrape_bypasses_the_cache(self):
+        async with self.scraper:
+            await self.scraper._scrape_one("NFL", self.url)
+            await self.scraper._scrape_one("NFL", self.url, frozenset({"moneyline"}))
+        
+        self.assertEqual(self.if_none_match, [None, None])
+        self.assertEqual(self.scraper._extract_odds.call_count, 2)
+    
+    async def test_saved_cache_points_into_the_stored_odds(self):
+        async with self.scraper:
+            data = await self.scraper._scrape_one("NFL", self.url)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "http_cache.json")
+            await BaseScraper.save_conditional_cache(path)
+            with open(path, "rb") as f:
+                saved = orjson.loads(f.read())
+            self.assertEqual(saved, {self.url: {"etag": '"v1"', "last_modified": None, "sport": "NFL", "bookmaker": "Test"}})
+            
+            # A restarted process takes the data from the odds file
+            BaseScraper._conditional_cache = {}
+            await BaseScraper.load_conditional_cache(path, {"NFL": {"Test": data}})
+            self.assertEqual(self.scraper.get_cached_odds(self.url), data)
+            
+            # URLs whose data is no longer stored are dropped
+            BaseScraper._conditional_cache = {}
+            await BaseScraper.load_conditional_cache(path, {})
+            self.assertEqual(self.scraper.get_cached_odds(self.url), {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+import orjson
+
+from scrapers.betmgm_scraper import BetMGMScraper
+from scrapers.draftkings_scraper import DraftKingsScraper
+from scrapers.fanduel_scraper import FanduelScraper
+
+def _extract(scraper, assignment: bytes, state) -> dict:
+    """Run a scraper's _extract_odds on a page holding the given state, as plain JSON"""
+    html = b"<html><body><script>" + assignment + b" = " + orjson.dumps(state) + b";</script></body></html>"
+    return orjson.loads(orjson.dumps(scraper._extract_odds(html, "NFL")))
+
+class FanduelMalformedDataTest(unittest.TestCase):
+    def extract(self, events):
+        return _extract(FanduelScraper(), b"window.INITIAL_STATE", {"competitions": [{"events": events}]})
+    
+    def test_null_entries_are_skipped(self):
+        odds = self.extract([None, {
+            "id": 1,
+            "name": "A v B",
+            "competitors": [{"name": "A"}, None],
+            "markets": [None, {"id": 2, "marketName": "Moneyline", "selections": [None, {"name": "A", "americanOdds": -110}]}]
+        }])
+        self.assertEqual(len(odds["events"]), 1)
+        event = odds["events"][0]
+        self.assertEqual(event["teams"], ["A"])
+        self.assertEqual([market["id"] for market in event["markets"]], [2])
+        self.assertEqual(event["markets"][0]["outcomes"], [{"name": "A", "price": -110, "points": None}])
+    
+    def test_non_list_fields_are_ignored(self):
+        odds = self.extract([
+            {"id": 1, "name": "A v B", "competitors": "A", "markets": 5},
+            {"id": 2, "name": "C v D", "markets": [{"id": 3, "marketName": "Total", "selections": {"name": "Over"}}]}
+        ])
+        self.assertEqual(odds["events"][0]["teams"], [])
+        self.assertEqual(odds["events"][0]["markets"], [])
+        self.assertEqual(odds["events"][1]["markets"][0]["outcomes"], [])
+
+class BetMGMMalformedDataTest(unittest.TestCase):
+    def extract(self, events):
+        return _extract(BetMGMScraper(), b"__PRELOADED_STATE__", {"competitions": [{"events": events}]})
+    
+    def test_null_price_keeps_the_rest_of_the_market(self):
+        odds = self.extract([{
+            "id": 1,
+            "name": "A v B",
+            "markets": [{"id": 2, "name": "Moneyline", "selections": [
+                {"name": "A", "price": None},
+                {"name": "B", "price": {"american": 120}, "handicap": None}
+            ]}]
+        }])
+        outcomes = odds["events"][0]["markets"][0]["outcomes"]
+        self.assertEqual(outcomes, [
+            {"name": "A", "price": None, "points": None},
+            {"name": "B", "price": 120, "points": None}
+        ])
+    
+    def test_non_list_fields_are_ignored(self):
+        odds = self.extract([None, {"id": 1, "name": "A v B", "participants": None, "markets": {"id": 2}}])
+        self.assertEqual(odds["events"], [{"id": 1, "name": "A v B", "start_time": None, "teams": [], "markets": []}])
+
+class DraftKingsMalformedDataTest(unittest.TestCase):
+    def extract(self, events):
+        return _extract(DraftKingsScraper(), b"window.__INITIAL_STATE__", {"eventGroups": [{"events": events}]})
+    
+    def test_null_and_non_list_fields_are_skipped(self):
+        odds = self.extract([None, {
+            "eventId": 1,
+            "name": "A v B",
+            "offers": [None, {"offerId": 2, "label": "Moneyline", "outcomes": [None, {"label": "A", "oddsAmerican": "+100"}]}]
+        }, {"eventId": 3, "name": "C v D", "offers": "none"}])
+        self.assertEqual([event["id"] for event in odds["events"]], [1, 3])
+        self.assertEqual(odds["events"][0]["markets"][0]["outcomes"], [{"name": "A", "price": "+100", "points": None}])
+        self.assertEqual(odds["events"][1]["markets"], [])
+
+if __name__ == "__main__":
+    unittest.main()
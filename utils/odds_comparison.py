@@ -1,3 +1,5 @@
+from collections import defaultdict
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 import logging
 
@@ -21,142 +23,141 @@ def compare_odds(sport_data: Dict[str, Any], event_id: Optional[str] = None, mar
     """
     comparisons = []
     
+    # Normalize the filters once rather than per event and market
+    event_id_str = str(event_id) if event_id else None
+    market_type_lower = market_type.lower() if market_type else None
+    # Lowercased market names, as the same names repeat across events and bookmakers
+    lower_names = {}
+    
     try:
-        # Get all events from all bookmakers
+        # Flat tables filled in a single pass over every bookmaker's events, keyed by
+        # event key, (event key, market key) and (event key, market key, outcome name).
+        # Their values are the response's own dicts, so no intermediate aggregate
+        # objects are built and converted at the end
         all_events = {}
+        all_markets = {}
+        all_prices = defaultdict(dict)
         
         for bookmaker, data in sport_data.items():
             if "events" not in data:
                 continue
             
+            # Only the last listing of an event counts for a bookmaker
+            bookmaker_events = {}
             for event in data["events"]:
-                event_key = event.get("id") or event.get("name")
+                event_get = event.get
+                event_key = event_get("id") or event_get("name")
                 if not event_key:
                     continue
                 
-                if event_id and str(event_key) != str(event_id):
+                if event_id_str and str(event_key) != event_id_str:
                     continue
                 
                 if event_key not in all_events:
                     all_events[event_key] = {
-                        "id": event.get("id"),
-                        "name": event.get("name"),
-                        "start_time": event.get("start_time"),
-                        "teams": event.get("teams", []),
-                        "bookmakers": {}
+                        "id": event_get("id"),
+                        "name": event_get("name"),
+                        "start_time": event_get("start_time"),
+                        "teams": event_get("teams", [])
                     }
-                
-                # Add markets for this bookmaker
-                all_events[event_key]["bookmakers"][bookmaker] = {
-                    "markets": event.get("markets", [])
-                }
-        
-        # For each event, compare the odds across bookmakers
-        for event_key, event_data in all_events.items():
-            # Get all unique market types across all bookmakers
-            all_markets = {}
+                bookmaker_events[event_key] = event
             
-            for bookmaker, bookmaker_data in event_data["bookmakers"].items():
-                for market in bookmaker_data["markets"]:
-                    market_key = market.get("id") or market.get("name")
+            for event_key, event in bookmaker_events.items():
+                # Likewise only the last listing of a market counts within an event
+                bookmaker_markets = {}
+                for market in event.get("markets", []):
+                    market_get = market.get
+                    market_key = market_get("id") or market_get("name")
                     if not market_key:
                         continue
                     
                     # Filter by market type if specified
-                    if market_type and market_type.lower() not in market.get("name", "").lower():
-                        continue
+                    if market_type_lower:
+                        market_name = market_get("name", "")
+                        name_lower = lower_names.get(market_name)
+                        if name_lower is None:
+                            name_lower = lower_names[market_name] = market_name.lower()
+                        if market_type_lower not in name_lower:
+                            continue
                     
-                    if market_key not in all_markets:
-                        all_markets[market_key] = {
-                            "id": market.get("id"),
-                            "name": market.get("name"),
-                            "bookmakers": {}
+                    if (event_key, market_key) not in all_markets:
+                        all_markets[(event_key, market_key)] = {
+                            "id": market_get("id"),
+                            "name": market_get("name")
                         }
-                    
-                    # Add outcomes for this bookmaker
-                    all_markets[market_key]["bookmakers"][bookmaker] = {
-                        "outcomes": market.get("outcomes", [])
-                    }
-            
-            # For each market, compare the odds across bookmakers
-            market_comparisons = []
-            for market_key, market_data in all_markets.items():
-                # Get all unique outcomes across all bookmakers
-                all_outcomes = {}
+                    bookmaker_markets[market_key] = market
                 
-                for bookmaker, bookmaker_data in market_data["bookmakers"].items():
-                    for outcome in bookmaker_data["outcomes"]:
+                for market_key, market in bookmaker_markets.items():
+                    for outcome in market.get("outcomes", []):
                         outcome_key = outcome.get("name")
                         if not outcome_key:
                             continue
                         
-                        if outcome_key not in all_outcomes:
-                            all_outcomes[outcome_key] = {
-                                "name": outcome_key,
-                                "bookmakers": {}
-                            }
-                        
                         # Add price for this bookmaker
-                        all_outcomes[outcome_key]["bookmakers"][bookmaker] = {
+                        all_prices[(event_key, market_key, outcome_key)][bookmaker] = {
                             "price": outcome.get("price"),
                             "points": outcome.get("points")
                         }
+        
+        # Group the flat price table back into outcomes per market, with the best odds for each
+        market_outcomes = defaultdict(list)
+        for (event_key, market_key, outcome_key), bookmaker_prices in all_prices.items():
+            # Outcomes only have a handful of prices, so a plain comparison loop beats
+            # converting them to decimal odds in batches
+            best_price = None
+            best_bookmaker = None
+            
+            for bookmaker, price_data in bookmaker_prices.items():
+                price = price_data.get("price")
+                if price is None:
+                    continue
                 
-                # Find the best odds for each outcome
-                for outcome_key, outcome_data in all_outcomes.items():
-                    best_price = None
-                    best_bookmaker = None
-                    
-                    for bookmaker, price_data in outcome_data["bookmakers"].items():
-                        price = price_data.get("price")
-                        if price is None:
-                            continue
-                        
-                        # Convert to numeric if it's a string
-                        if isinstance(price, str):
-                            try:
-                                price = float(price.replace("+", ""))
-                            except ValueError:
-                                continue
-                        
-                        # For American odds, higher positive or lower negative is better
-                        if best_price is None or \
-                           (price > 0 and (best_price <= 0 or price > best_price)) or \
-                           (price < 0 and best_price < 0 and price > best_price):
-                            best_price = price
-                            best_bookmaker = bookmaker
-                    
-                    outcome_data["best_price"] = best_price
-                    outcome_data["best_bookmaker"] = best_bookmaker
+                # Convert to numeric if it's a string
+                if isinstance(price, str):
+                    try:
+                        price = float(price.replace("+", ""))
+                    except ValueError:
+                        continue
                 
-                # Add the market comparison
-                market_comparisons.append({
-                    "market": {
-                        "id": market_data.get("id"),
-                        "name": market_data.get("name")
-                    },
-                    "outcomes": list(all_outcomes.values())
-                })
+                # For American odds, higher positive or lower negative is better
+                if best_price is None or \
+                   (price > 0 and (best_price <= 0 or price > best_price)) or \
+                   (price < 0 and best_price < 0 and price > best_price):
+                    best_price = price
+                    best_bookmaker = bookmaker
             
-            # Add the event comparison
-            comparisons.append({
-                "event": {
-                    "id": event_data.get("id"),
-                    "name": event_data.get("name"),
-                    "start_time": event_data.get("start_time"),
-                    "teams": event_data.get("teams")
-                },
-                "markets": market_comparisons
+            market_outcomes[(event_key, market_key)].append({
+                "name": outcome_key,
+                "bookmakers": bookmaker_prices,
+                "best_price": best_price,
+                "best_bookmaker": best_bookmaker
+            })
+        
+        # Group markets per event
+        event_markets = defaultdict(list)
+        for (event_key, market_key), market_data in all_markets.items():
+            event_markets[event_key].append({
+                "market": market_data,
+                "outcomes": market_outcomes.get((event_key, market_key), [])
             })
+        
+        comparisons = [
+            {"event": event_data, "markets": event_markets.get(event_key, [])}
+            for event_key, event_data in all_events.items()
+        ]
     
     except Exception as e:
         logger.error(f"Error comparing odds: {str(e)}")
     
     return comparisons
 
+@lru_cache(maxsize=4096)
 def american_to_decimal(american_odds: float) -> float:
     """Convert American odds to decimal odds
     
+    Results are memoized: a handful of prices such as -110 or +100 make up most
+    lookups, and ints and integral floats (-110 and -110.0) share a cache entry.
+    
     Args:
         american_odds: The American odds
         